@@ -14,33 +14,55 @@ Features:
 
 Run:
     pip install ttkbootstrap pandas matplotlib openpyxl
+    pip install xlsxwriter  # optional, faster Excel export
     python advanced_student_mgmt.py
 """
 
 import os
+import sys
 import sqlite3
 import threading
+import queue
 import shutil
+import tempfile
 import time
 import csv
 import io
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from functools import partial
 
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import messagebox, filedialog
-from tkinter import StringVar, IntVar
+from tkinter import StringVar, IntVar, PhotoImage
 
 import pandas as pd
+import openpyxl
+try:
+    import xlsxwriter  # optional: faster constant-memory xlsx writer
+except ImportError:
+    xlsxwriter = None
 import matplotlib
-matplotlib.use("Agg")  # avoid default interactive backend initially
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+matplotlib.use("Agg")  # charts are rendered off-screen and shown as images
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 
 # ------------------------- CONFIG -------------------------
 DB_FILE = "advanced_students.db"
+AUDIT_DB_FILE = "audit.db"
+# read pages through a memory map; a 32-bit process can't spare 256MB of address space
+MMAP_SIZE = 268435456 if sys.maxsize > 2**32 else 0
+SQLITE_INT_MIN, SQLITE_INT_MAX = -2**63, 2**63 - 1  # range of an SQLite INTEGER
 PAGE_SIZE_DEFAULT = 50
+SEARCH_DEBOUNCE_MS = 250
+IMPORT_COLUMNS = ("name","roll","course","marks")
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_SECS = 0.5
+AUDIT_VIEW_LIMIT = 1000
 THEME_LIGHT = "cosmo"
 THEME_DARK = "darkly"
 AVAILABLE_THEMES = [
@@ -48,15 +70,55 @@ AVAILABLE_THEMES = [
     "cyborg","darkly","slate","solar","superhero","morph","vapor","vapor"
 ]
 
+# ------------------------- SQL -------------------------
+# Fixed statement text so sqlite3's per-connection statement cache always hits
+SQL_INSERT_STUDENT = "INSERT INTO students (name,roll,course,marks) VALUES (?,?,?,?)"
+SQL_IMPORT_STUDENT = "INSERT OR IGNORE INTO students (name,roll,course,marks) VALUES (?,?,?,?)"
+SQL_RESTORE_STUDENT = "INSERT INTO students (id,name,roll,course,marks,created_at) VALUES (?,?,?,?,?,?)"
+SQL_UPDATE_STUDENT = "UPDATE students SET name=?, roll=?, course=?, marks=? WHERE id=?"
+SQL_SELECT_STUDENT = "SELECT * FROM students WHERE id=?"
+SQL_DELETE_STUDENT = "DELETE FROM students WHERE id=?"
+SQL_DELETE_STUDENT_ROLL = "DELETE FROM students WHERE roll=?"
+SQL_EXPORT_STUDENTS = "SELECT id,name,roll,course,marks,created_at FROM students"
+SQL_INSERT_AUDIT = "INSERT INTO audit_log (user,role,action,details) VALUES (?,?,?,?)"  # audit writer connection
+
 # ------------------------- DB HELPERS -------------------------
 def get_conn():
-    conn = sqlite3.connect(DB_FILE, timeout=10, check_same_thread=False)
+    # autocommit mode: writers open their own transactions via transaction()
+    conn = sqlite3.connect(DB_FILE, timeout=10, check_same_thread=False,
+                           cached_statements=256, isolation_level=None)
     conn.row_factory = sqlite3.Row
+    # Per-connection settings only; journal_mode=WAL is persistent and set in init_db.
+    # NORMAL sync under WAL: one fsync per checkpoint instead of two per commit
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # checkpoint every ~40MB of WAL (4KB pages); journal_size_limit still caps the file
+    conn.execute("PRAGMA wal_autocheckpoint=10000")
+    conn.execute("PRAGMA journal_size_limit=67108864")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    # audit rows live in their own file; losing the last few on a crash is acceptable
+    conn.execute("ATTACH DATABASE ? AS audit", (AUDIT_DB_FILE,))
+    conn.execute("PRAGMA audit.synchronous=OFF")
+    conn.execute("PRAGMA audit.journal_size_limit=67108864")
     return conn
 
-def init_db():
-    conn = get_conn()
+def get_audit_conn():
+    # the audit writer opens only the audit file, never the main DB
+    conn = sqlite3.connect(AUDIT_DB_FILE, timeout=10, check_same_thread=False,
+                           cached_statements=256, isolation_level=None)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA journal_size_limit=67108864")
+    return conn
+
+def create_schema(conn):
+    # WAL is recorded in the file header, so every later connection inherits it
+    conn.execute("PRAGMA main.journal_mode=WAL")
+    conn.execute("PRAGMA audit.journal_mode=WAL")
     cur = conn.cursor()
+    cur.execute("BEGIN")
     # Students table
     cur.execute("""
     CREATE TABLE IF NOT EXISTS students (
@@ -67,16 +129,26 @@ def init_db():
         marks INTEGER DEFAULT 0,
         created_at TEXT DEFAULT CURRENT_TIMESTAMP
     )""")
-    # Audit log
+    # Audit log (attached audit database)
+    cur.execute("SELECT 1 FROM audit.sqlite_master WHERE type='table' AND name='audit_log'")
+    audit_exists = cur.fetchone() is not None
     cur.execute("""
-    CREATE TABLE IF NOT EXISTS audit_log (
+    CREATE TABLE IF NOT EXISTS audit.audit_log (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ts TEXT,
+        ts TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
         user TEXT,
         role TEXT,
         action TEXT,
         details TEXT
     )""")
+    # Move the audit_log that older versions kept in the main DB
+    cur.execute("SELECT 1 FROM main.sqlite_master WHERE type='table' AND name='audit_log'")
+    if cur.fetchone():
+        if not audit_exists:
+            cur.execute("""
+            INSERT INTO audit.audit_log (ts,user,role,action,details)
+            SELECT ts,user,role,action,details FROM main.audit_log ORDER BY id""")
+        cur.execute("DROP TABLE main.audit_log")
     # Users table (simple)
     cur.execute("""
     CREATE TABLE IF NOT EXISTS users (
@@ -87,7 +159,31 @@ def init_db():
     # Indexes for fast search
     cur.execute("CREATE INDEX IF NOT EXISTS idx_students_roll ON students(roll)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_students_name ON students(name)")
-    conn.commit()
+    # Matches the listing order so pages can seek instead of OFFSET
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_students_name_id ON students(name COLLATE NOCASE, id)")
+    # Full-text index shadowing students (LIKE '%x%' cannot use the indexes above)
+    cur.execute("SELECT 1 FROM sqlite_master WHERE name='students_fts'")
+    fts_exists = cur.fetchone() is not None
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+        name, roll, course, content='students', content_rowid='id'
+    )""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+        INSERT INTO students_fts(rowid,name,roll,course) VALUES (new.id,new.name,new.roll,new.course);
+    END""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+        INSERT INTO students_fts(students_fts,rowid,name,roll,course) VALUES ('delete',old.id,old.name,old.roll,old.course);
+    END""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE ON students BEGIN
+        INSERT INTO students_fts(students_fts,rowid,name,roll,course) VALUES ('delete',old.id,old.name,old.roll,old.course);
+        INSERT INTO students_fts(rowid,name,roll,course) VALUES (new.id,new.name,new.roll,new.course);
+    END""")
+    if not fts_exists:
+        # index rows that predate the FTS table
+        cur.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
     # Ensure at least an admin account exists
     cur.execute("SELECT COUNT(*) as c FROM users")
     if cur.fetchone()["c"] == 0:
@@ -96,19 +192,18 @@ def init_db():
                     ("admin", "admin", "Admin"))
         cur.execute("INSERT OR REPLACE INTO users (username,password,role) VALUES (?,?,?)",
                     ("teacher", "teacher", "Teacher"))
-        conn.commit()
-    conn.close()
+    conn.commit()
 
-def log_audit(user, role, action, details=""):
+def init_db():
+    conn = get_conn()
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("INSERT INTO audit_log (ts,user,role,action,details) VALUES (?,?,?,?,?)",
-                    (datetime.utcnow().isoformat(), user, role, action, details))
-        conn.commit()
+        create_schema(conn)
+    finally:
+        # closing also rolls back whatever a failed statement left open
         conn.close()
-    except Exception as e:
-        print("Audit log failed:", e)
+
+NAME_PUNCT_TABLE = str.maketrans("", "", " .-")  # punctuation allowed in names
+_AUDIT_FLUSH = object()  # queue marker: write the pending audit batch now
 
 # ------------------------- UTIL -------------------------
 def safe_commit(conn):
@@ -118,6 +213,102 @@ def safe_commit(conn):
         conn.rollback()
         raise
 
+@contextmanager
+def transaction(conn, immediate=False):
+    # immediate: take the write lock up front instead of on the first write
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        # also covers a failed COMMIT (e.g. SQLITE_BUSY), which would leave the transaction open
+        conn.rollback()
+        raise
+
+def fts_match_query(text):
+    # every search term becomes a quoted prefix query, e.g. 'jo cse' -> '"jo"* "cse"*'
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"*' for t in terms)
+
+def check_import_columns(columns):
+    # expect columns: name,roll,course,marks (case-insensitive)
+    if not set(IMPORT_COLUMNS).issubset(columns):
+        raise ValueError(f"File missing columns. Need at least: {set(IMPORT_COLUMNS)}")
+
+def iter_import_rows(path):
+    # yields insertable (name, roll, course, marks); CSV is streamed, only Excel goes through pandas
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            reader.fieldnames = [c.strip().lower() for c in reader.fieldnames or []]
+            check_import_columns(reader.fieldnames)
+            yield from coerce_import_rows((r["name"], r["roll"], r["course"], r["marks"]) for r in reader)
+    else:
+        # parse only the four needed columns, all as text (no dtype inference)
+        df = pd.read_excel(path, dtype=str, usecols=lambda c: str(c).strip().lower() in IMPORT_COLUMNS)
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        check_import_columns(df.columns)
+        # validate column-wise: drop incomplete rows and non-numeric marks in one pass
+        df = df.dropna(subset=list(IMPORT_COLUMNS))
+        marks = pd.to_numeric(df["marks"], errors="coerce")
+        # whitespace-only fields count as missing, as on the CSV path;
+        # marks must fit in int64 (and so an SQLite INTEGER), which also rules out inf
+        blank = (df[["name", "roll", "course"]].apply(lambda c: c.str.strip()) == "").any(axis=1)
+        keep = marks.notna() & (marks.abs() < 2.0**63) & ~blank
+        df = df[keep]
+        # tolist() hands sqlite3 plain Python ints rather than numpy scalars
+        yield from zip(df["name"].tolist(), df["roll"].tolist(), df["course"].tolist(),
+                       marks[keep].astype("int64").tolist())
+
+def coerce_import_rows(records):
+    # skip rows with missing fields or unusable marks
+    for name, roll, course, marks in records:
+        # blank cells arrive as "" from csv and as NaN from pandas
+        if any(pd.isna(v) or not str(v).strip() for v in (name, roll, course)):
+            continue
+        try:
+            marks = int(float(marks))
+        except (TypeError, ValueError, OverflowError):
+            continue
+        # sqlite3 cannot bind ints outside the INTEGER range
+        if SQLITE_INT_MIN <= marks <= SQLITE_INT_MAX:
+            yield str(name), str(roll), str(course), marks
+
+def stage_db_file(src):
+    # copy src beside DB_FILE and make sure it is a students database; returns the copy's path
+    tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(DB_FILE)), suffix=".restore", delete=False)
+    try:
+        with tmp, open(src, "rb") as f:
+            shutil.copyfileobj(f, tmp)
+        # NamedTemporaryFile is created 0600; keep the permissions of the file it replaces
+        if os.path.exists(DB_FILE):
+            shutil.copymode(DB_FILE, tmp.name)
+        check = sqlite3.connect(tmp.name)
+        try:
+            result = check.execute("PRAGMA quick_check").fetchone()[0]
+            has_students = check.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='students'").fetchone()
+        finally:
+            check.close()
+        if result != "ok":
+            raise sqlite3.DatabaseError(f"Backup failed integrity check: {result}")
+        if not has_students:
+            raise sqlite3.DatabaseError("Backup has no students table")
+    except Exception:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+    return tmp.name
+
+def replace_db_file(src):
+    # swap src (a staged copy, or the file it displaced) in with a single atomic rename
+    os.replace(src, DB_FILE)
+    # a leftover WAL/SHM belongs to the old file and must not be replayed onto the new one
+    for suffix in ("-wal", "-shm"):
+        try:
+            os.remove(DB_FILE + suffix)
+        except FileNotFoundError:
+            pass
+
 def timestamped_backup_path():
     return f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
 
@@ -134,13 +325,103 @@ class StudentERPApp:
         self.page_size = IntVar(value=PAGE_SIZE_DEFAULT)
         self.current_page = 0
         self.total_rows = 0
+        self._page_keys = {0: None}  # page -> (name, id) of the last row before it
+        self._page_keys_size = PAGE_SIZE_DEFAULT  # page size the keys were recorded with
+        self._count_cache = {}  # search text -> COUNT(*); cleared when students change
         self.undo_stack = []  # store tuples (action, payload)
         self.redo_stack = []
+        self._search_after = None  # pending debounced search callback
+        self._form_traces = []  # (var, trace id) registered by build_manage_tab
+        self._chart_seq = 0  # bumped per chart render; stale results are dropped
+        self._charts_dirty = True  # students changed since the charts were last built
+        # one long-lived connection; writes are serialized through the lock
+        self.open_conn()
+        self._db_lock = threading.Lock()
+        # audit events are written in batches by a background thread
+        self._audit_q = queue.Queue()
+        self._audit_thread = threading.Thread(target=self._audit_drain, daemon=True)
+        self._audit_thread.start()
+        # import files are parsed off the Tk thread; inserts stay on self.conn
+        self._import_pool = ThreadPoolExecutor(max_workers=1)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         # Build UI
         self.build_login_screen()
 
+    def open_conn(self):
+        self.conn = get_conn()
+        # long-lived connection: let SQLite refresh planner stats up front (optimize also runs on close)
+        self.conn.execute("PRAGMA optimize=0x10002")
+
+    def on_close(self):
+        try:
+            self._audit_q.put(None)
+            self._audit_thread.join(timeout=5)
+            self._import_pool.shutdown(wait=False)
+            self.conn.execute("PRAGMA optimize")
+            self.conn.close()
+        finally:
+            self.root.destroy()
+
+    def students_changed(self):
+        # drop anything derived from the students table
+        self._count_cache.clear()
+        self._charts_dirty = True
+
+    def log_audit(self, action, details=""):
+        # ts is filled in by the column default when the batch is written;
+        # non-string details are serialized on the writer thread
+        self._audit_q.put((self.current_user, self.current_role, action, details))
+
+    def flush_audit(self):
+        # block until every queued audit event is committed
+        self._audit_q.put(_AUDIT_FLUSH)
+        self._audit_q.join()
+
+    def _audit_drain(self):
+        # own connection, so batches never share a transaction with the UI thread;
+        # if it cannot be opened, keep draining so flush_audit() never blocks forever
+        try:
+            conn = get_audit_conn()
+        except Exception as e:
+            print("Audit log unavailable:", e)
+            conn = None
+        while True:
+            items = [self._audit_q.get()]
+            deadline = time.monotonic() + AUDIT_FLUSH_SECS
+            while isinstance(items[-1], tuple) and len(items) < AUDIT_BATCH_SIZE:
+                try:
+                    items.append(self._audit_q.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                batch = [i if isinstance(i[3], str) else i[:3] + (json.dumps(i[3], separators=(",", ":"), default=str),)
+                         for i in items if isinstance(i, tuple)]
+                if batch and conn is not None:
+                    with transaction(conn):
+                        conn.executemany(SQL_INSERT_AUDIT, batch)
+            except Exception as e:
+                print("Audit log failed:", e)
+            for _ in items:
+                self._audit_q.task_done()
+            if items[-1] is None:
+                break
+        if conn is not None:
+            conn.close()
+
+    def _teardown_main_ui(self):
+        # release Tcl callbacks that point at widgets about to be destroyed
+        for var, trace_id in self._form_traces:
+            try:
+                var.trace_remove("write", trace_id)
+            except Exception:
+                pass
+        self._form_traces = []
+        self._cancel_pending_search()
+        self._chart_seq += 1
+
     # -------------------- LOGIN --------------------
     def build_login_screen(self):
+        self._teardown_main_ui()
         for w in self.root.winfo_children():
             w.destroy()
         frame = ttk.Frame(self.root, padding=20)
@@ -166,15 +447,13 @@ class StudentERPApp:
         if not user or not pwd:
             messagebox.showwarning("Login", "Enter username and password")
             return
-        conn = get_conn()
-        cur = conn.cursor()
+        cur = self.conn.cursor()
         cur.execute("SELECT role FROM users WHERE username=? AND password=?", (user, pwd))
         row = cur.fetchone()
-        conn.close()
         if row:
             self.current_user = user
             self.current_role = row["role"]
-            log_audit(self.current_user, self.current_role, "login", "successful login")
+            self.log_audit("login", "successful login")
             self.build_main_ui()
         else:
             messagebox.showerror("Login Failed", "Invalid credentials")
@@ -182,7 +461,7 @@ class StudentERPApp:
     def login_as_guest(self):
         self.current_user = "guest"
         self.current_role = "Guest"
-        log_audit(self.current_user, self.current_role, "login", "guest login")
+        self.log_audit("login", "guest login")
         self.build_main_ui()
 
     # -------------------- MAIN UI --------------------
@@ -217,12 +496,15 @@ class StudentERPApp:
         # Notebook
         self.notebook = ttk.Notebook(content)
         self.notebook.pack(side="left", fill="both", expand=True, padx=(4,8), pady=8)
-        # Build tabs
+        # Build tabs; the heavier ones start empty and are filled in on first visit
+        self._lazy_tabs = {}  # notebook index -> (frame, builder)
+        self._tabs_built = {}
         self.build_manage_tab()
-        self.build_reports_tab()
+        self._add_lazy_tab("Reports", self.build_reports_tab)
         self.build_import_tab()
-        self.build_audit_tab()
-        self.build_settings_tab()
+        self._add_lazy_tab("Audit Log", self.build_audit_tab)
+        self._add_lazy_tab("Settings", self.build_settings_tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
         # status bar
         self.statusbar = ttk.Label(self.root, text="Ready", bootstyle="secondary")
         self.statusbar.pack(fill="x", side="bottom")
@@ -230,10 +512,32 @@ class StudentERPApp:
         self.notebook.select(0)
         self.refresh_status()
 
+    def _add_lazy_tab(self, text, builder):
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text=text)
+        i = self.notebook.index(tab)
+        self._lazy_tabs[i] = (tab, builder)
+        self._tabs_built[i] = False
+
+    def _build_tab(self, i):
+        if self._tabs_built.get(i) is False:
+            self._tabs_built[i] = True
+            tab, builder = self._lazy_tabs[i]
+            builder(tab)
+
+    def _on_tab_changed(self, event=None):
+        i = self.notebook.index("current")
+        self._build_tab(i)
+        # the one place tabs refresh, whether picked from the sidebar or the notebook
+        if i == 1:
+            self.refresh_charts()
+        elif i == 3:
+            self.load_audit()
+
     def logout(self):
         confirm = messagebox.askyesno("Logout", "Are you sure you want to logout?")
         if confirm:
-            log_audit(self.current_user, self.current_role, "logout", "user logged out")
+            self.log_audit("logout", "user logged out")
             self.current_user = None
             self.current_role = None
             self.build_login_screen()
@@ -242,12 +546,11 @@ class StudentERPApp:
         if text:
             self.statusbar.configure(text=text)
             return
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) as c FROM students")
-        total = cur.fetchone()["c"]
-        conn.close()
-        self.total_rows = total
+        total = self._count_cache.get("")
+        if total is None:
+            cur = self.conn.cursor()
+            cur.execute("SELECT COUNT(*) as c FROM students")
+            total = self._count_cache[""] = cur.fetchone()["c"]
         self.statusbar.configure(text=f"DB: {DB_FILE} | Records: {total} | User: {self.current_user} ({self.current_role})")
 
     # -------------------- MANAGE TAB --------------------
@@ -308,7 +611,7 @@ class StudentERPApp:
         self.search_text = StringVar()
         search_entry = ttk.Entry(mid, textvariable=self.search_text)
         search_entry.pack(side="left", fill="x", expand=True, padx=6)
-        search_entry.bind("<KeyRelease>", lambda e: self.load_page(0))
+        search_entry.bind("<KeyRelease>", self._debounced_search)
         ttk.Button(mid, text="Clear Search", bootstyle="secondary", command=self.clear_search).pack(side="left", padx=6)
 
         # Pagination controls
@@ -322,6 +625,7 @@ class StudentERPApp:
         table_frame.pack(fill="both", expand=True)
         cols = ("ID","Name","Roll","Course","Marks","Created")
         self.tree = ttk.Treeview(table_frame, columns=cols, show="headings")
+        self._tree_rows = {}  # iid -> values currently shown
         for c in cols:
             self.tree.heading(c, text=c)
             if c=="Name":
@@ -336,54 +640,67 @@ class StudentERPApp:
         # initial load
         self.load_page(0)
 
-        # validation binding
-        for var in (self.m_name, self.m_roll, self.m_course, self.m_marks):
+        # validation binding: each field only re-checks itself
+        self._field_valid = {}
+        self._form_state = None
+        for var, check in ((self.m_name, self._validate_name), (self.m_roll, self._validate_roll),
+                           (self.m_course, self._validate_course), (self.m_marks, self._validate_marks)):
             # trace changes for live validation
             try:
-                var.trace_add("write", lambda *args: self.validate_form())
+                trace_id = var.trace_add("write", lambda *args, check=check: self._on_field_change(check))
+                self._form_traces.append((var, trace_id))
             except Exception:
                 pass
         self.validate_form()
 
-    def validate_form(self):
-        ok = True
+    def _validate_name(self):
         name = self.m_name.get().strip()
+        letters = name.translate(NAME_PUNCT_TABLE)
+        ok = bool(name) and (not letters or letters.isalpha())
+        self.name_err.configure(text="" if ok else "Invalid name (letters, space, . -)")
+        self._field_valid["name"] = ok
+
+    def _validate_roll(self):
         roll = self.m_roll.get().strip()
-        course = self.m_course.get().strip()
+        ok = roll.isdigit() and len(roll) <= 12
+        self.roll_err.configure(text="" if ok else "Roll numeric (1-12 digits)")
+        self._field_valid["roll"] = ok
+
+    def _validate_course(self):
+        ok = bool(self.m_course.get().strip())
+        self.course_err.configure(text="" if ok else "Choose or enter course")
+        self._field_valid["course"] = ok
+
+    def _validate_marks(self):
         marks = self.m_marks.get().strip()
-        # name
-        if not name or any((not (ch.isalpha() or ch in " .-") for ch in name)):
-            self.name_err.configure(text="Invalid name (letters, space, . -)")
-            ok = False
-        else:
-            self.name_err.configure(text="")
-        # roll
-        if not roll or not roll.isdigit() or len(roll) > 12:
-            self.roll_err.configure(text="Roll numeric (1-12 digits)")
-            ok = False
-        else:
-            self.roll_err.configure(text="")
-        # course
-        if not course:
-            self.course_err.configure(text="Choose or enter course")
-            ok = False
-        else:
-            self.course_err.configure(text="")
-        # marks
-        if not marks.isdigit() or not (0 <= int(marks) <= 100):
-            self.marks_err.configure(text="Marks 0-100")
-            ok = False
-        else:
-            self.marks_err.configure(text="")
-        # set button state
+        ok = marks.isdigit() and 0 <= int(marks) <= 100
+        self.marks_err.configure(text="" if ok else "Marks 0-100")
+        self._field_valid["marks"] = ok
+
+    def _on_field_change(self, check):
+        check()
+        self._update_form_buttons()
+
+    def _update_form_buttons(self):
+        ok = all(self._field_valid.values())
         state = "normal" if ok else "disabled"
+        if state == self._form_state:
+            return ok
         try:
             self.btn_add.configure(state=state)
             self.btn_update.configure(state=state)
+            self._form_state = state
         except Exception:
             pass
         return ok
 
+    def validate_form(self):
+        self._validate_name()
+        self._validate_roll()
+        self._validate_course()
+        self._validate_marks()
+        return self._update_form_buttons()
+
     def add_student(self):
         if not self.validate_form():
             messagebox.showwarning("Validation", "Fix validation errors first")
@@ -393,13 +710,10 @@ class StudentERPApp:
         course = self.m_course.get().strip()
         marks = int(self.m_marks.get().strip())
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute("INSERT INTO students (name,roll,course,marks) VALUES (?,?,?,?)",
-                        (name, roll, course, marks))
-            conn.commit()
-            conn.close()
-            log_audit(self.current_user, self.current_role, "add", f"{roll}|{name}")
+            with self._db_lock, transaction(self.conn):
+                self.conn.execute(SQL_INSERT_STUDENT, (name, roll, course, marks))
+            self.students_changed()
+            self.log_audit("add", f"{roll}|{name}")
             # push undo action
             self.undo_stack.append(("delete", {"roll": roll}))
             self.redo_stack.clear()
@@ -426,13 +740,11 @@ class StudentERPApp:
         new = {"name": self.m_name.get().strip(), "roll": self.m_roll.get().strip(),
                "course": self.m_course.get().strip(), "marks": int(self.m_marks.get().strip())}
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute("UPDATE students SET name=?, roll=?, course=?, marks=? WHERE id=?",
-                        (new["name"], new["roll"], new["course"], new["marks"], sid))
-            conn.commit()
-            conn.close()
-            log_audit(self.current_user, self.current_role, "update", f"id={sid}|from={old}|to={new}")
+            with self._db_lock, transaction(self.conn):
+                self.conn.execute(SQL_UPDATE_STUDENT,
+                                  (new["name"], new["roll"], new["course"], new["marks"], sid))
+            self.students_changed()
+            self.log_audit("update", {"id": sid, "from": old, "to": new})
             # push undo
             self.undo_stack.append(("update", {"id": sid, "old": old}))
             self.redo_stack.clear()
@@ -458,15 +770,14 @@ class StudentERPApp:
         if not messagebox.askyesno("Confirm", f"Delete {name} (roll {roll})?"):
             return
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            # store old for undo
-            cur.execute("SELECT * FROM students WHERE id=?", (sid,))
-            old = dict(cur.fetchone())
-            cur.execute("DELETE FROM students WHERE id=?", (sid,))
-            conn.commit()
-            conn.close()
-            log_audit(self.current_user, self.current_role, "delete", f"id={sid}|{roll}|{name}")
+            with self._db_lock, transaction(self.conn):
+                cur = self.conn.cursor()
+                # store old for undo
+                cur.execute(SQL_SELECT_STUDENT, (sid,))
+                old = dict(cur.fetchone())
+                cur.execute(SQL_DELETE_STUDENT, (sid,))
+            self.students_changed()
+            self.log_audit("delete", f"id={sid}|{roll}|{name}")
             self.undo_stack.append(("insert", {"row": old}))
             self.redo_stack.clear()
             self.load_page(self.current_page)
@@ -502,9 +813,8 @@ class StudentERPApp:
         search = self.search_text.get().strip()
         args = []
         if search:
-            like = f"%{search}%"
-            base += " WHERE roll LIKE ? OR name LIKE ? OR course LIKE ?"
-            args.extend([like, like, like])
+            base += " WHERE id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)"
+            args.append(fts_match_query(search))
         return base, args
 
     def load_page(self, page):
@@ -512,24 +822,50 @@ class StudentERPApp:
             page = max(0, int(page))
         except Exception:
             page = 0
+        size = self.page_size.get()
+        if page == 0 or size != self._page_keys_size:
+            # new search / page size: previous boundaries no longer apply
+            self._page_keys = {0: None}
+            self._page_keys_size = size
         self.current_page = page
-        offset = page * self.page_size.get()
         base, args = self.build_query_base()
-        conn = get_conn()
-        cur = conn.cursor()
-        # total count
-        cur.execute(f"SELECT COUNT(*) as c {base}", args)
-        total = cur.fetchone()["c"]
+        cur = self.conn.cursor()
+        # total count, reused until the search text or the data changes
+        search = self.search_text.get().strip()
+        total = self._count_cache.get(search)
+        if total is None:
+            cur.execute(f"SELECT COUNT(*) as c {base}", args)
+            total = self._count_cache[search] = cur.fetchone()["c"]
         self.total_rows = total
-        # fetch page
-        cur.execute(f"SELECT id,name,roll,course,marks,created_at {base} ORDER BY name COLLATE NOCASE LIMIT ? OFFSET ?",
-                    args + [self.page_size.get(), offset])
+        # fetch page: seek past the previous page's last row when we know it
+        order = "ORDER BY name COLLATE NOCASE, id LIMIT ?"
+        if page in self._page_keys:
+            key = self._page_keys[page]
+            if key is not None:
+                base += " AND" if " WHERE " in base else " WHERE"
+                base += " name COLLATE NOCASE >= ? AND (name COLLATE NOCASE, id) > (?, ?)"
+                args = args + [key[0], key[0], key[1]]
+            cur.execute(f"SELECT id,name,roll,course,marks,created_at {base} {order}", args + [size])
+        else:
+            cur.execute(f"SELECT id,name,roll,course,marks,created_at {base} {order} OFFSET ?",
+                        args + [size, page * size])
         rows = cur.fetchall()
-        conn.close()
-        # populate tree
-        self.tree.delete(*self.tree.get_children())
-        for r in rows:
-            self.tree.insert("", "end", values=(r["id"], r["name"], r["roll"], r["course"], r["marks"], r["created_at"]))
+        if rows:
+            self._page_keys[page + 1] = (rows[-1]["name"], rows[-1]["id"])
+        # populate tree: rows are keyed by id so only changed rows touch Tk
+        new_rows = {str(r["id"]): tuple(r) for r in rows}
+        stale = [iid for iid in self._tree_rows if iid not in new_rows]
+        if stale:
+            self.tree.delete(*stale)
+        for iid, values in new_rows.items():
+            old = self._tree_rows.get(iid)
+            if old is None:
+                self.tree.insert("", "end", iid=iid, values=values)
+            elif old != values:
+                self.tree.item(iid, values=values)
+        if list(self.tree.get_children()) != list(new_rows):
+            self.tree.set_children("", *new_rows)
+        self._tree_rows = new_rows
         # update page label
         total_pages = max(1, (self.total_rows + self.page_size.get() - 1) // self.page_size.get())
         self.lbl_page.configure(text=f"Page {self.current_page+1} / {total_pages}")
@@ -544,7 +880,22 @@ class StudentERPApp:
         if self.current_page + 1 < total_pages:
             self.load_page(self.current_page + 1)
 
+    def _debounced_search(self, event=None):
+        # run one query once typing pauses instead of one per keystroke
+        self._cancel_pending_search()
+        self._search_after = self.root.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _cancel_pending_search(self):
+        if self._search_after:
+            self.root.after_cancel(self._search_after)
+            self._search_after = None
+
+    def _run_search(self):
+        self._search_after = None
+        self.load_page(0)
+
     def clear_search(self):
+        self._cancel_pending_search()
         self.search_text.set("")
         self.load_page(0)
 
@@ -557,32 +908,27 @@ class StudentERPApp:
         try:
             if action == "delete":
                 # payload: {"roll": roll} -> delete that roll
-                conn = get_conn()
-                cur = conn.cursor()
-                cur.execute("DELETE FROM students WHERE roll=?", (payload["roll"],))
-                conn.commit(); conn.close()
-                log_audit(self.current_user, self.current_role, "undo_delete", payload["roll"])
+                with self._db_lock, transaction(self.conn):
+                    self.conn.execute(SQL_DELETE_STUDENT_ROLL, (payload["roll"],))
+                self.log_audit("undo_delete", payload["roll"])
                 self.redo_stack.append(("insert", {"roll": payload["roll"]}))
             elif action == "insert":
                 # payload: {"row": oldrow}
                 row = payload["row"]
-                conn = get_conn()
-                cur = conn.cursor()
-                cur.execute("INSERT INTO students (id,name,roll,course,marks,created_at) VALUES (?,?,?,?,?,?)",
-                            (row["id"], row["name"], row["roll"], row["course"], row["marks"], row["created_at"]))
-                conn.commit(); conn.close()
-                log_audit(self.current_user, self.current_role, "undo_insert", str(row["id"]))
+                with self._db_lock, transaction(self.conn):
+                    self.conn.execute(SQL_RESTORE_STUDENT,
+                                      (row["id"], row["name"], row["roll"], row["course"], row["marks"], row["created_at"]))
+                self.log_audit("undo_insert", str(row["id"]))
                 self.redo_stack.append(("delete", {"roll": row["roll"]}))
             elif action == "update":
                 # payload: {"id": id, "old": olddict}
                 old = payload["old"]
-                conn = get_conn()
-                cur = conn.cursor()
-                cur.execute("UPDATE students SET name=?, roll=?, course=?, marks=? WHERE id=?",
-                            (old["name"], old["roll"], old["course"], old["marks"], old["id"]))
-                conn.commit(); conn.close()
-                log_audit(self.current_user, self.current_role, "undo_update", str(old["id"]))
+                with self._db_lock, transaction(self.conn):
+                    self.conn.execute(SQL_UPDATE_STUDENT,
+                                      (old["name"], old["roll"], old["course"], old["marks"], old["id"]))
+                self.log_audit("undo_update", str(old["id"]))
                 self.redo_stack.append(("update_redo", {"id": old["id"]}))
+            self.students_changed()
             self.load_page(self.current_page)
             messagebox.showinfo("Undo", "Undo performed")
         except Exception as e:
@@ -598,55 +944,78 @@ class StudentERPApp:
         self.load_page(self.current_page)
 
     # -------------------- REPORTS TAB --------------------
-    def build_reports_tab(self):
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text="Reports")
+    def build_reports_tab(self, tab):
         top = ttk.Frame(tab, padding=8)
         top.pack(fill="x")
-        ttk.Button(top, text="Refresh Charts", bootstyle="outline-primary", command=self.refresh_charts).pack(side="left", padx=6)
+        ttk.Button(top, text="Refresh Charts", bootstyle="outline-primary", command=lambda: self.refresh_charts(force=True)).pack(side="left", padx=6)
         ttk.Button(top, text="Export Chart as PNG", bootstyle="outline-secondary", command=self.export_chart_png).pack(side="left", padx=6)
         # chart area
         chart_frame = ttk.Frame(tab)
         chart_frame.pack(fill="both", expand=True, padx=8, pady=8)
-        self.fig = Figure(figsize=(8,5))
-        self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
-        self.canvas.get_tk_widget().pack(fill="both", expand=True)
-        self.refresh_charts()
+        self.chart_label = ttk.Label(chart_frame, anchor="center")
+        self.chart_label.pack(fill="both", expand=True)
+        self.fig = None  # last rendered figure, kept for PNG export
+        self._chart_image = None
+        self.refresh_charts(force=True)
 
-    def refresh_charts(self):
+    def refresh_charts(self, force=False):
+        # tab switches only rebuild when the data changed
+        if not (force or self._charts_dirty):
+            return
         try:
-            conn = get_conn()
-            cur = conn.cursor()
+            cur = self.conn.cursor()
             # distribution of students by course
             cur.execute("SELECT course, COUNT(*) as c FROM students GROUP BY course")
             rows = cur.fetchall()
             courses = [r["course"] for r in rows]
             counts = [r["c"] for r in rows]
-            # marks histogram
-            cur.execute("SELECT marks FROM students")
-            marks = [r["marks"] for r in cur.fetchall()]
-            conn.close()
+            # marks histogram, binned in SQL: 0-9, 10-19, ..., 90-99, 100
+            cur.execute("SELECT (marks/10)*10 AS bin, COUNT(*) as c FROM students GROUP BY bin ORDER BY bin")
+            bins = [(r["bin"], r["c"]) for r in cur.fetchall()]
+            self._charts_dirty = False
+            # render off the Tk thread; only the finished image comes back
+            self._chart_seq += 1
+            w, h = self.chart_label.winfo_width(), self.chart_label.winfo_height()
+            size = (w, h) if w > 1 and h > 1 else (800, 500)
+            threading.Thread(target=self._render_charts, daemon=True,
+                             args=(self._chart_seq, size, courses, counts, bins)).start()
+            self.log_audit("refresh_charts", "")
+        except Exception as e:
+            messagebox.showerror("Charts Error", str(e))
 
-            self.fig.clear()
-            ax1 = self.fig.add_subplot(121)
+    def _render_charts(self, seq, size, courses, counts, bins):
+        try:
+            fig = Figure(figsize=(size[0] / 100, size[1] / 100), dpi=100)
+            canvas = FigureCanvasAgg(fig)
+            ax1 = fig.add_subplot(121)
             ax1.bar(courses if courses else ["No data"], counts if counts else [0])
             ax1.set_title("Students per Course")
             ax1.tick_params(axis='x', rotation=45)
 
-            ax2 = self.fig.add_subplot(122)
-            if marks:
-                ax2.hist(marks, bins=10)
+            ax2 = fig.add_subplot(122)
+            if bins:
+                ax2.bar([b for b, _ in bins], [c for _, c in bins], width=9, align="edge")
             else:
                 ax2.text(0.5, 0.5, "No marks data", ha="center")
             ax2.set_title("Marks Distribution")
 
-            self.canvas.draw()
-            log_audit(self.current_user, self.current_role, "refresh_charts", "")
+            buf = io.BytesIO()
+            canvas.print_png(buf)
+            self.root.after(0, self._paint_charts, seq, fig, base64.b64encode(buf.getvalue()))
         except Exception as e:
-            messagebox.showerror("Charts Error", str(e))
+            self.root.after(0, messagebox.showerror, "Charts Error", str(e))
+
+    def _paint_charts(self, seq, fig, png_b64):
+        if seq != self._chart_seq:
+            return  # a newer refresh is on its way
+        self.fig = fig
+        self._chart_image = PhotoImage(data=png_b64)
+        self.chart_label.configure(image=self._chart_image)
 
     def export_chart_png(self):
+        if self.fig is None:
+            messagebox.showinfo("Charts", "Charts are still rendering")
+            return
         file = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG image","*.png")])
         if not file:
             return
@@ -667,45 +1036,37 @@ class StudentERPApp:
     def import_file(self):
         path = filedialog.askopenfilename(filetypes=[("CSV files","*.csv"),("Excel files","*.xlsx;*.xls")])
         if not path: return
+        self.refresh_status(f"Importing {os.path.basename(path)}...")
+        future = self._import_pool.submit(lambda: list(iter_import_rows(path)))
+        future.add_done_callback(lambda f: self.root.after(0, self._finish_import, path, f))
+
+    def _finish_import(self, path, future):
         try:
-            if path.lower().endswith(".csv"):
-                df = pd.read_csv(path, dtype=str)
-            else:
-                df = pd.read_excel(path, dtype=str)
-            # expect columns: name,roll,course,marks (case-insensitive)
-            df.columns = [c.strip().lower() for c in df.columns]
-            expected = {"name","roll","course","marks"}
-            if not expected.issubset(set(df.columns)):
-                messagebox.showerror("Import Error", f"File missing columns. Need at least: {expected}")
-                return
-            # insert rows
-            conn = get_conn()
-            cur = conn.cursor()
-            inserted = 0
-            for _, r in df.iterrows():
-                try:
-                    cur.execute("INSERT INTO students (name,roll,course,marks) VALUES (?,?,?,?)",
-                                (str(r["name"]), str(r["roll"]), str(r["course"]), int(float(r["marks"])) ))
-                    inserted += 1
-                except Exception:
-                    continue
-            conn.commit()
-            conn.close()
-            log_audit(self.current_user, self.current_role, "import", f"{path}|inserted={inserted}")
+            rows = future.result()
+            # single transaction; duplicate rolls are skipped by OR IGNORE
+            with self._db_lock, transaction(self.conn, immediate=True):
+                inserted = self.conn.executemany(SQL_IMPORT_STUDENT, rows).rowcount
+            self.students_changed()
+            self.log_audit("import", f"{path}|inserted={inserted}")
             messagebox.showinfo("Import", f"Import complete. Inserted {inserted} rows.")
             self.load_page(0)
         except Exception as e:
+            self.refresh_status()
             messagebox.showerror("Import Error", str(e))
 
     def export_csv(self):
         path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files","*.csv")])
         if not path: return
         try:
-            conn = get_conn()
-            df = pd.read_sql_query("SELECT * FROM students", conn)
-            conn.close()
-            df.to_csv(path, index=False)
-            log_audit(self.current_user, self.current_role, "export_csv", path)
+            # csv.writer consumes the cursor directly; no DataFrame in between
+            cur = self.conn.cursor()
+            cur.row_factory = None  # plain tuples for the writer
+            cur.execute(SQL_EXPORT_STUDENTS)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow([d[0] for d in cur.description])
+                w.writerows(cur)
+            self.log_audit("export_csv", path)
             messagebox.showinfo("Export", f"Exported to {path}")
         except Exception as e:
             messagebox.showerror("Export Error", str(e))
@@ -714,11 +1075,26 @@ class StudentERPApp:
         path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files","*.xlsx")])
         if not path: return
         try:
-            conn = get_conn()
-            df = pd.read_sql_query("SELECT * FROM students", conn)
-            conn.close()
-            df.to_excel(path, index=False)
-            log_audit(self.current_user, self.current_role, "export_excel", path)
+            cur = self.conn.cursor()
+            cur.row_factory = None  # plain tuples for the writer
+            cur.execute(SQL_EXPORT_STUDENTS)
+            header = [d[0] for d in cur.description]
+            # both writers stream rows straight from the cursor
+            if xlsxwriter is not None:
+                wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+                ws = wb.add_worksheet("Sheet1")
+                ws.write_row(0, 0, header)
+                for i, row in enumerate(cur, 1):
+                    ws.write_row(i, 0, row)
+                wb.close()
+            else:
+                wb = openpyxl.Workbook(write_only=True)
+                ws = wb.create_sheet("Sheet1")
+                ws.append(header)
+                for row in cur:
+                    ws.append(row)
+                wb.save(path)
+            self.log_audit("export_excel", path)
             messagebox.showinfo("Export", f"Exported to {path}")
         except Exception as e:
             messagebox.showerror("Export Error", str(e))
@@ -726,57 +1102,102 @@ class StudentERPApp:
     def backup_db(self):
         try:
             backup_path = timestamped_backup_path()
-            shutil.copyfile(DB_FILE, backup_path)
-            log_audit(self.current_user, self.current_role, "backup", backup_path)
+            # online backup API: consistent snapshot including WAL content
+            dst = sqlite3.connect(backup_path)
+            try:
+                self.conn.backup(dst, pages=1024, progress=self._backup_progress, sleep=0)
+            finally:
+                dst.close()
+                self.refresh_status()
+            self.log_audit("backup", backup_path)
             messagebox.showinfo("Backup", f"DB backed up to {backup_path}")
         except Exception as e:
             messagebox.showerror("Backup Error", str(e))
 
+    def _backup_progress(self, status, remaining, total):
+        self.refresh_status(f"Backing up DB... {total - remaining}/{total} pages")
+        self.statusbar.update_idletasks()
+
     def restore_db(self):
         path = filedialog.askopenfilename(filetypes=[("DB files","*.db"),("All files","*.*")])
         if not path: return
         if not messagebox.askyesno("Restore", "This will replace the current DB. Continue?"):
             return
         try:
-            shutil.copyfile(path, DB_FILE)
-            log_audit(self.current_user, self.current_role, "restore", path)
-            messagebox.showinfo("Restore", "DB restored. Restarting application.")
-            self.root.after(100, lambda: os.execl(sys.executable, sys.executable, *sys.argv))
+            # a bad file is rejected here, before the working connection is touched
+            staged = stage_db_file(path)
+            previous = DB_FILE + ".previous"  # kept until the restored file has opened
+            try:
+                # fold the WAL into the main file and release the only handle on it
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self.conn.close()
+                os.replace(DB_FILE, previous)
+                replace_db_file(staged)
+                # bring older backups up to the current schema (FTS, indexes, audit split)
+                init_db()
+                self.open_conn()
+            except Exception:
+                # put the previous file back rather than leave a closed handle behind
+                self.conn.close()
+                if os.path.exists(previous):
+                    replace_db_file(previous)
+                if os.path.exists(staged):
+                    os.remove(staged)
+                self.open_conn()
+                raise
+            os.remove(previous)
+            # reopen in place instead of restarting the process
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+            self.students_changed()
+            self.log_audit("restore", path)
+            self.load_page(0)
+            messagebox.showinfo("Restore", "DB restored.")
         except Exception as e:
             messagebox.showerror("Restore Error", str(e))
 
     # -------------------- AUDIT TAB --------------------
-    def build_audit_tab(self):
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text="Audit Log")
+    def build_audit_tab(self, tab):
         frame = ttk.Frame(tab, padding=8)
         frame.pack(fill="both", expand=True)
         cols = ("TS","User","Role","Action","Details")
         self.audit_tree = ttk.Treeview(frame, columns=cols, show="headings")
+        # fixed widths: Tk never has to redistribute column space as rows arrive
         for c in cols:
             self.audit_tree.heading(c, text=c)
-            self.audit_tree.column(c, width=150, anchor="w")
+            self.audit_tree.column(c, width=300 if c == "Details" else 150, anchor="w", stretch=False)
         self.audit_tree.pack(fill="both", expand=True, side="left")
-        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.audit_tree.yview)
-        vsb.pack(side="right", fill="y")
-        self.audit_tree.configure(yscroll=vsb.set)
-        # load audit
-        self.load_audit()
+        self.audit_vsb = ttk.Scrollbar(frame, orient="vertical", command=self.audit_tree.yview)
+        self.audit_vsb.pack(side="right", fill="y")
+        self.audit_tree.configure(yscroll=self.audit_vsb.set)
+        self._last_audit_id = 0  # newest audit id already in the tree; rows load when the tab is shown
 
     def load_audit(self):
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT ts,user,role,action,details FROM audit_log ORDER BY id DESC LIMIT 1000")
+        self.flush_audit()
+        # only fetch entries newer than what the tree already shows
+        cur = self.conn.cursor()
+        cur.row_factory = None  # plain tuples; columns are read by position
+        cur.execute("SELECT id,ts,user,role,action,details FROM audit.audit_log WHERE id > ? ORDER BY id DESC LIMIT ?",
+                    (self._last_audit_id, AUDIT_VIEW_LIMIT))
         rows = cur.fetchall()
-        conn.close()
-        self.audit_tree.delete(*self.audit_tree.get_children())
-        for r in rows:
-            self.audit_tree.insert("", "end", values=(r["ts"], r["user"], r["role"], r["action"], r["details"]))
+        if not rows:
+            return
+        # unmap the tree during bulk loads so it is laid out once, not per row
+        bulk = len(rows) > 100
+        if bulk:
+            self.audit_tree.pack_forget()
+        # rows are newest first; put them above the existing ones in that order
+        for i, r in enumerate(rows):
+            self.audit_tree.insert("", i, values=r[1:])
+        self._last_audit_id = rows[0][0]
+        overflow = self.audit_tree.get_children()[AUDIT_VIEW_LIMIT:]
+        if overflow:
+            self.audit_tree.delete(*overflow)
+        if bulk:
+            self.audit_tree.pack(fill="both", expand=True, side="left", before=self.audit_vsb)
 
     # -------------------- SETTINGS TAB --------------------
-    def build_settings_tab(self):
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text="Settings")
+    def build_settings_tab(self, tab):
         frame = ttk.Frame(tab, padding=12)
         frame.pack(fill="x")
         # theme
@@ -810,26 +1231,30 @@ class StudentERPApp:
             messagebox.showerror("Page Size Error", str(e))
 
     # -------------------- NAV HELPERS --------------------
+    def _show_tab(self, i):
+        if self.notebook.index("current") == i:
+            # select() on the current tab emits no <<NotebookTabChanged>>; refresh it directly
+            self._on_tab_changed()
+        else:
+            self.notebook.select(i)
+
     def show_manage_tab(self):
-        self.notebook.select(0)
+        self._show_tab(0)
 
     def show_reports_tab(self):
-        self.notebook.select(1)
-        self.refresh_charts()
+        self._show_tab(1)
 
     def show_import_tab(self):
-        self.notebook.select(2)
+        self._show_tab(2)
 
     def show_audit_tab(self):
-        self.notebook.select(3)
-        self.load_audit()
+        self._show_tab(3)
 
     def show_settings_tab(self):
-        self.notebook.select(4)
+        self._show_tab(4)
 
 # ------------------------- STARTUP -------------------------
 if __name__ == "__main__":
-    import sys
     init_db()
     # Create root with initial theme
     try: